@@ -1,20 +1,31 @@
 from fastapi import FastAPI, Request, HTTPException
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel
 import os
 import random
+import itertools
 import asyncio
 from dotenv import load_dotenv
-from typing import List, Dict
+from typing import Deque, Dict, Optional
 import logging
 import time
-from collections import defaultdict
-import redis
+from collections import defaultdict, deque
+import redis.asyncio as redis
+from redis.exceptions import NoScriptError, ResponseError
 import json
-from sqlalchemy import create_engine, Column, String, Float, Integer, Index
+import hashlib
+import gzip
+from sqlalchemy import BigInteger, Column, Integer, String, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
 from datetime import datetime, timedelta
+from contextlib import asynccontextmanager
+from cerebras.cloud.sdk import AsyncCerebras
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
 
 # Load environment variables
 load_dotenv()
@@ -23,11 +34,36 @@ load_dotenv()
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared connection pools on startup and release them on shutdown"""
+    await init_database()
+    await init_redis()
+    history_task = asyncio.create_task(flush_ui_history()) if redis_client else None
+    yield
+    if history_task:
+        # Let the consumer write everything still queued before Redis closes
+        ui_history_queue.put_nowait(None)
+        try:
+            await asyncio.wait_for(history_task, HISTORY_SHUTDOWN_TIMEOUT)
+        except Exception as e:
+            logger.warning(f"History flush did not finish on shutdown: {e}")
+    if redis_client:
+        await redis_client.aclose()
+        await redis_pool.disconnect()
+    if db_engine:
+        await db_engine.dispose()
+    if cerebras_client:
+        await cerebras_client.close()
+
+
 # Initialize FastAPI
 app = FastAPI(
     title="Dynamic UI Generator",
-    description="An app that generates new LLM-created UIs on every request",
+    description="An app that serves LLM-created UIs, caching repeat prompts for a configurable time",
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 
@@ -52,50 +88,130 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 if not CEREBRAS_API_KEY:
     logger.warning("CEREBRAS_API_KEY not found in environment variables")
 
+# Shared Cerebras client so HTTP connections are reused across requests
+CEREBRAS_TIMEOUT = 60.0  # seconds per attempt
+CEREBRAS_MAX_RETRIES = 2
+cerebras_client = (
+    AsyncCerebras(
+        api_key=CEREBRAS_API_KEY,
+        max_retries=CEREBRAS_MAX_RETRIES,
+        timeout=CEREBRAS_TIMEOUT,
+    )
+    if CEREBRAS_API_KEY
+    else None
+)
+
 # Database setup for rate limiting
 Base = declarative_base()
 db_engine = None
 SessionLocal = None
 
 
-class RateLimitRecord(Base):
-    __tablename__ = "rate_limits"
+class RateLimitBucket(Base):
+    __tablename__ = "rate_limit_buckets"
+
+    client_ip = Column(String, primary_key=True)
+    bucket = Column(Integer, primary_key=True)
+    epoch = Column(BigInteger, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+
 
-    id = Column(Integer, primary_key=True, index=True)
-    client_ip = Column(String, index=True)
-    timestamp = Column(Float, index=True)
+# Connection pool sizing (sized for bursts; pre-ping and recycle avoid stale connections)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "20"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
 
-    __table_args__ = (Index("idx_client_timestamp", "client_ip", "timestamp"),)
 
+def get_async_database_url(url: str) -> str:
+    """Point a postgres:// or postgresql:// URL at the asyncpg driver"""
+    for prefix in ("postgres://", "postgresql://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix) :]
+    return url
+
+
+async def init_database():
+    """Create the async engine and session factory, and ensure tables exist"""
+    global db_engine, SessionLocal
+
+    if not DATABASE_URL:
+        return
 
-# Initialize database connection
-if DATABASE_URL:
     try:
-        db_engine = create_engine(DATABASE_URL)
-        SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=db_engine)
+        db_engine = create_async_engine(
+            get_async_database_url(DATABASE_URL),
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=30,
+            pool_pre_ping=True,
+            pool_recycle=3600,
+        )
+        SessionLocal = async_sessionmaker(
+            bind=db_engine, class_=AsyncSession, expire_on_commit=False
+        )
         # Create tables
-        Base.metadata.create_all(bind=db_engine)
+        async with db_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
         logger.info("Connected to database successfully")
     except Exception as e:
         logger.warning(f"Failed to connect to database: {e}")
+        if db_engine:
+            await db_engine.dispose()
         db_engine = None
         SessionLocal = None
 
-# Initialize Redis connection
+
+# Redis connection (shared pool, opened in lifespan)
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "50"))
+redis_pool = None
 redis_client = None
-if REDIS_URL:
+
+# Token bucket per IP: refills RATE_LIMIT_REQUESTS tokens per window.
+# KEYS[1] = bucket hash, ARGV = capacity, window seconds, current time.
+RATE_LIMIT_LUA = """
+local capacity = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or capacity
+local ts = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * capacity / window)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(window))
+return allowed
+"""
+RATE_LIMIT_SHA = hashlib.sha1(RATE_LIMIT_LUA.encode()).hexdigest()
+
+
+async def init_redis():
+    """Create the shared async Redis pool and verify the connection"""
+    global redis_pool, redis_client
+
+    if not REDIS_URL:
+        logger.warning("REDIS_URL not found. Using database or in-memory rate limiting")
+        return
+
     try:
-        redis_client = redis.from_url(REDIS_URL, decode_responses=True)
+        redis_pool = redis.ConnectionPool.from_url(
+            REDIS_URL, max_connections=REDIS_MAX_CONNECTIONS, decode_responses=True
+        )
+        redis_client = redis.Redis(connection_pool=redis_pool)
         # Test connection
-        redis_client.ping()
+        await redis_client.ping()
         logger.info("Connected to Redis successfully")
     except Exception as e:
         logger.warning(
             f"Failed to connect to Redis: {e}. Falling back to database or in-memory rate limiting."
         )
+        if redis_pool:
+            await redis_pool.disconnect()
+        redis_pool = None
         redis_client = None
-else:
-    logger.warning("REDIS_URL not found. Using database or in-memory rate limiting")
+
 
 # UI generation prompts
 UI_PROMPTS = [
@@ -119,92 +235,368 @@ UI_PROMPTS = [
 # Available models
 AVAILABLE_MODELS = ["qwen-3-coder-480b", "gpt-oss-120b"]
 
-# In-memory storage for UI history
-ui_history: List[Dict] = []
+# Pre-shuffled rings so each pick is a single next() instead of an RNG call.
+# Every entry appears 8 times per cycle, keeping the distribution uniform.
+PROMPT_CYCLE = itertools.cycle(random.sample(UI_PROMPTS * 8, len(UI_PROMPTS) * 8))
+MODEL_CYCLE = itertools.cycle(
+    random.sample(AVAILABLE_MODELS * 8, len(AVAILABLE_MODELS) * 8)
+)
+
+UI_HISTORY_LIMIT = 20
+
+# In-memory storage for UI history (oldest entries are evicted automatically),
+# used when Redis is not available
+ui_history: Deque[Dict] = deque(maxlen=UI_HISTORY_LIMIT)
+
+# With Redis, history is shared across workers in a capped list. Entries are
+# queued on the request path and written in batches by flush_ui_history.
+UI_HISTORY_KEY = "ui_history"
+HISTORY_SHUTDOWN_TIMEOUT = 5  # seconds to wait for queued history on shutdown
+HISTORY_RETRY_INTERVAL = 5  # seconds between retries of failed history writes
+ui_history_queue: asyncio.Queue = asyncio.Queue()
+
+
+def record_ui_history(ui_entry: Dict):
+    """Store a history entry without doing any I/O on the request path"""
+    if redis_client:
+        ui_history_queue.put_nowait(ui_entry)
+    else:
+        ui_history.append(ui_entry)
+
+
+async def flush_ui_history():
+    """Background consumer writing queued history entries to Redis in batches
+
+    Entries that fail to write are retried with the next batch (and shown from
+    the in-memory deque meanwhile). A None in the queue stops the consumer
+    once everything queued before it has been written.
+    """
+    unflushed = []
+    while True:
+        try:
+            # Wake up periodically to retry failed writes even without new entries
+            timeout = HISTORY_RETRY_INTERVAL if unflushed else None
+            batch = [await asyncio.wait_for(ui_history_queue.get(), timeout)]
+        except asyncio.TimeoutError:
+            batch = []
+        while not ui_history_queue.empty():
+            batch.append(ui_history_queue.get_nowait())
+        stop = any(entry is None for entry in batch)
+        new_entries = [entry for entry in batch if entry is not None]
+
+        entries = unflushed + new_entries
+        if entries:
+            try:
+                async with redis_client.pipeline(transaction=False) as pipe:
+                    pipe.lpush(
+                        UI_HISTORY_KEY, *(json.dumps(entry) for entry in entries)
+                    )
+                    pipe.ltrim(UI_HISTORY_KEY, 0, UI_HISTORY_LIMIT - 1)
+                    await pipe.execute()
+                unflushed = []
+            except Exception as e:
+                logger.error(f"Redis history error: {e}. Retrying with the next batch.")
+                ui_history.extend(new_entries)
+                unflushed = entries[-UI_HISTORY_LIMIT:]
+
+        if stop:
+            return
+
+
+async def load_ui_history(limit: int):
+    """Return the latest `limit` history entries (oldest first) and the total"""
+    if redis_client:
+        try:
+            async with redis_client.pipeline(transaction=False) as pipe:
+                pipe.lrange(UI_HISTORY_KEY, 0, limit - 1)
+                pipe.llen(UI_HISTORY_KEY)
+                raw_entries, total = await pipe.execute()
+            return [json.loads(entry) for entry in reversed(raw_entries)], total
+        except Exception as e:
+            logger.error(f"Redis history error: {e}. Using in-memory history.")
+
+    return list(ui_history)[-limit:], len(ui_history)
+
+
+async def count_ui_history(timeout: Optional[float] = None) -> int:
+    """Return the number of stored history entries, waiting at most `timeout`"""
+    if redis_client:
+        try:
+            return await asyncio.wait_for(redis_client.llen(UI_HISTORY_KEY), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Redis history count timed out. Using in-memory history.")
+        except Exception as e:
+            logger.error(f"Redis history error: {e}. Using in-memory history.")
+
+    return len(ui_history)
+
+
+# Response cache for generated UIs (Redis only; evicted by the server's LRU
+# policy). Set UI_CACHE_TTL to 0 to generate a fresh UI on every request.
+UI_CACHE_TTL = int(os.getenv("UI_CACHE_TTL", "3600"))
 
 # Rate limiting configuration
 RATE_LIMIT_REQUESTS = int(os.getenv("RATE_LIMIT_REQUESTS", "5"))
 RATE_LIMIT_WINDOW = int(os.getenv("RATE_LIMIT_WINDOW", "60"))  # 60 seconds
 
-# Fallback in-memory storage (used when Redis is not available)
-rate_limit_storage = defaultdict(list)
+# The window is split into RATE_LIMIT_BUCKETS fixed slots. "epoch" is the
+# absolute bucket number, and a slot only counts while it is one of the
+# last RATE_LIMIT_BUCKETS epochs.
+RATE_LIMIT_BUCKETS = int(os.getenv("RATE_LIMIT_BUCKETS", "10"))
+RATE_LIMIT_BUCKET_SIZE = RATE_LIMIT_WINDOW / RATE_LIMIT_BUCKETS
+
+# Checks for one IP are serialized with a transaction-scoped advisory lock.
+# It has to be its own statement: under READ COMMITTED a statement reads the
+# snapshot taken when it starts, so a lock taken inside the same statement
+# would still let two concurrent checks read the same stale count.
+RATE_LIMIT_LOCK_SQL = text("SELECT pg_advisory_xact_lock(hashtext(:client_ip))")
+
+# Sum the live buckets and, if under limit, bump the current one (resetting
+# it when its epoch is stale).
+RATE_LIMIT_SQL = text("""
+    WITH cnt AS (
+        SELECT coalesce(sum(count), 0) AS n FROM rate_limit_buckets
+        WHERE client_ip = :client_ip AND epoch > :oldest
+    )
+    INSERT INTO rate_limit_buckets (client_ip, bucket, epoch, count)
+    SELECT :client_ip, :bucket, :epoch, 1
+    WHERE (SELECT n FROM cnt) < :limit
+    ON CONFLICT (client_ip, bucket) DO UPDATE SET
+        count = CASE
+            WHEN rate_limit_buckets.epoch = EXCLUDED.epoch
+            THEN rate_limit_buckets.count + 1
+            ELSE 1
+        END,
+        epoch = EXCLUDED.epoch
+    RETURNING count
+    """)
+
+# Fallback in-memory storage (used when Redis is not available):
+# a ring of [epoch, count] slots per IP
+rate_limit_storage = defaultdict(lambda: [[-1, 0] for _ in range(RATE_LIMIT_BUCKETS)])
+
+
+class TimeBloomFilter:
+    """Bloom filter remembering keys seen within the last period
+
+    Two bit arrays rotate every `period` seconds, so the filter always covers
+    the current and previous period. A miss means the key was definitely not
+    seen in the last `period` seconds; a hit means it may have been.
+    """
+
+    def __init__(self, period: float, size_bits: int = 1 << 17, hashes: int = 4):
+        self.period = period
+        self.size_bits = size_bits
+        self.hashes = hashes
+        self.generation = None
+        self.current = bytearray(size_bits // 8)
+        self.previous = bytearray(size_bits // 8)
+
+    def _rotate(self, now: float):
+        generation = int(now // self.period)
+        if generation == self.generation:
+            return
+        if self.generation is not None and generation == self.generation + 1:
+            self.previous = self.current
+        else:
+            self.previous = bytearray(self.size_bits // 8)
+        self.current = bytearray(self.size_bits // 8)
+        self.generation = generation
+
+    def _positions(self, key: str):
+        digest = hashlib.blake2b(key.encode(), digest_size=4 * self.hashes).digest()
+        for i in range(0, len(digest), 4):
+            yield int.from_bytes(digest[i : i + 4], "little") % self.size_bits
+
+    def check_and_add(self, key: str, now: float) -> bool:
+        """Mark key as seen and report whether it may have been seen before"""
+        self._rotate(now)
+        seen_current = seen_previous = True
+        for pos in self._positions(key):
+            byte, mask = pos >> 3, 1 << (pos & 7)
+            seen_current = seen_current and bool(self.current[byte] & mask)
+            seen_previous = seen_previous and bool(self.previous[byte] & mask)
+            self.current[byte] |= mask
+        return seen_current or seen_previous
+
+
+class BatchingRateLimiter:
+    """Coalesce concurrent Redis rate-limit checks into one round trip
+
+    Checks arriving in the same event-loop tick are queued and sent together
+    as a single non-transactional pipeline of EVALSHA calls (or one plain
+    EVALSHA for a lone check); each caller gets the result for its own IP.
+    """
 
+    def __init__(self):
+        self.pending = []
+
+    def enqueue(self, client_ip: str, current_time: float) -> asyncio.Future:
+        """Queue a check for the next flush and return the future for its result
+
+        The check takes its place in the batch immediately, so it is counted
+        ahead of any check queued after it.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        if not self.pending:
+            loop.call_soon(self._flush)
+        self.pending.append((client_ip, current_time, future))
+        return future
+
+    async def check(self, client_ip: str, current_time: float) -> bool:
+        return await self.enqueue(client_ip, current_time)
+
+    def _flush(self):
+        batch, self.pending = self.pending, []
+        spawn_background(self._execute(batch))
+
+    async def _evalsha(self, batch):
+        """Run the script for each entry; per-command errors are returned in place"""
+        if len(batch) == 1:
+            client_ip, current_time, _ = batch[0]
+            try:
+                allowed = await redis_client.evalsha(
+                    RATE_LIMIT_SHA,
+                    1,
+                    f"rl:{client_ip}",
+                    RATE_LIMIT_REQUESTS,
+                    RATE_LIMIT_WINDOW,
+                    current_time,
+                )
+            except ResponseError as e:
+                return [e]
+            return [allowed]
+
+        pipe = redis_client.pipeline(transaction=False)
+        for client_ip, current_time, _ in batch:
+            pipe.evalsha(
+                RATE_LIMIT_SHA,
+                1,
+                f"rl:{client_ip}",
+                RATE_LIMIT_REQUESTS,
+                RATE_LIMIT_WINDOW,
+                current_time,
+            )
+        return await pipe.execute(raise_on_error=False)
 
-def check_rate_limit(client_ip: str) -> bool:
+    async def _execute(self, batch):
+        try:
+            results = await self._evalsha(batch)
+
+            # Script cache was flushed (e.g. Redis restart): load it and replay
+            # only the entries that hit NOSCRIPT, since the others were counted
+            missing = [
+                entry
+                for entry, result in zip(batch, results)
+                if isinstance(result, NoScriptError)
+            ]
+            if missing:
+                await redis_client.script_load(RATE_LIMIT_LUA)
+                retried = iter(await self._evalsha(missing))
+                results = [
+                    next(retried) if isinstance(result, NoScriptError) else result
+                    for result in results
+                ]
+        except Exception as e:
+            # Connection-level failure: nothing is known about any entry
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result == 1)
+
+
+redis_rate_limiter = BatchingRateLimiter()
+
+# Per-process filter in front of the Redis limiter
+rate_limit_bloom = TimeBloomFilter(period=RATE_LIMIT_WINDOW)
+
+# Strong references to fire-and-forget tasks so they are not garbage collected
+background_tasks = set()
+
+
+def spawn_background(coro):
+    """Run a coroutine in the background without awaiting it"""
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+
+async def check_rate_limit(client_ip: str) -> bool:
     """Check if client has exceeded rate limit using Redis, database, or in-memory fallback"""
     current_time = time.time()
 
+    if redis_client and RATE_LIMIT_REQUESTS > 0:
+        if not rate_limit_bloom.check_and_add(client_ip, current_time):
+            # Quiet for a whole window, so certainly under the limit. Admit it
+            # now, but reserve its token before returning so that concurrent
+            # requests from the same IP are counted after it. The filter only
+            # moves the Redis round trip off the response path; it still runs.
+            # (The database limiter has no synchronous reservation, so it is
+            # always checked inline.)
+            pending = redis_rate_limiter.enqueue(client_ip, current_time)
+            spawn_background(check_rate_limit_redis(client_ip, current_time, pending))
+            return True
+
+    return await check_rate_limit_backend(client_ip, current_time)
+
+
+async def check_rate_limit_backend(client_ip: str, current_time: float) -> bool:
+    """Dispatch to the Redis, database, or in-memory rate limiter"""
     if redis_client:
-        return check_rate_limit_redis(client_ip, current_time)
+        return await check_rate_limit_redis(client_ip, current_time)
     elif SessionLocal:
-        return check_rate_limit_database(client_ip, current_time)
+        return await check_rate_limit_database(client_ip, current_time)
     else:
         return check_rate_limit_memory(client_ip, current_time)
 
 
-def check_rate_limit_redis(client_ip: str, current_time: float) -> bool:
-    """Redis-based rate limiting"""
-    try:
-        key = f"rate_limit:{client_ip}"
-
-        # Use Redis pipeline for atomic operations
-        pipe = redis_client.pipeline()
-
-        # Remove expired entries
-        pipe.zremrangebyscore(key, 0, current_time - RATE_LIMIT_WINDOW)
-
-        # Count current requests
-        pipe.zcard(key)
-
-        # Add current request
-        pipe.zadd(key, {str(current_time): current_time})
-
-        # Set expiration for the key
-        pipe.expire(key, RATE_LIMIT_WINDOW)
-
-        # Execute pipeline
-        results = pipe.execute()
-        current_count = results[1]  # Result of zcard
+async def check_rate_limit_redis(
+    client_ip: str, current_time: float, pending: Optional[asyncio.Future] = None
+) -> bool:
+    """Redis-based rate limiting (token bucket, batched per event-loop tick)
 
-        return current_count < RATE_LIMIT_REQUESTS
+    `pending` is a check already queued with redis_rate_limiter.enqueue.
+    """
+    try:
+        if pending is None:
+            return await redis_rate_limiter.check(client_ip, current_time)
+        return await pending
 
     except Exception as e:
         logger.error(f"Redis rate limiting error: {e}. Falling back to in-memory.")
         return check_rate_limit_memory(client_ip, current_time)
 
 
-def check_rate_limit_database(client_ip: str, current_time: float) -> bool:
+async def check_rate_limit_database(client_ip: str, current_time: float) -> bool:
     """Database-based rate limiting"""
+    epoch = int(current_time // RATE_LIMIT_BUCKET_SIZE)
     try:
-        db = SessionLocal()
-        try:
-            # Clean old records outside the window
-            cutoff_time = current_time - RATE_LIMIT_WINDOW
-            db.query(RateLimitRecord).filter(
-                RateLimitRecord.client_ip == client_ip,
-                RateLimitRecord.timestamp < cutoff_time,
-            ).delete()
-
-            # Count current requests
-            current_count = (
-                db.query(RateLimitRecord)
-                .filter(RateLimitRecord.client_ip == client_ip)
-                .count()
-            )
-
-            # Check if under limit
-            if current_count >= RATE_LIMIT_REQUESTS:
-                return False
-
-            # Add current request
-            new_record = RateLimitRecord(client_ip=client_ip, timestamp=current_time)
-            db.add(new_record)
-            db.commit()
-
-            return True
-
-        finally:
-            db.close()
+        async with SessionLocal() as db:
+            async with db.begin():
+                await db.execute(RATE_LIMIT_LOCK_SQL, {"client_ip": client_ip})
+                result = await db.execute(
+                    RATE_LIMIT_SQL,
+                    {
+                        "client_ip": client_ip,
+                        "bucket": epoch % RATE_LIMIT_BUCKETS,
+                        "epoch": epoch,
+                        "oldest": epoch - RATE_LIMIT_BUCKETS,
+                        "limit": RATE_LIMIT_REQUESTS,
+                    },
+                )
+
+                # A returned row means the request was recorded (under limit)
+                return result.first() is not None
 
     except Exception as e:
         logger.error(f"Database rate limiting error: {e}. Falling back to in-memory.")
@@ -213,19 +605,23 @@ def check_rate_limit_database(client_ip: str, current_time: float) -> bool:
 
 def check_rate_limit_memory(client_ip: str, current_time: float) -> bool:
     """In-memory rate limiting (fallback)"""
-    # Clean old requests outside the window
-    rate_limit_storage[client_ip] = [
-        req_time
-        for req_time in rate_limit_storage[client_ip]
-        if current_time - req_time < RATE_LIMIT_WINDOW
-    ]
+    epoch = int(current_time // RATE_LIMIT_BUCKET_SIZE)
+    ring = rate_limit_storage[client_ip]
+
+    # Reuse the current slot, clearing it if it still holds an old epoch
+    slot = ring[epoch % RATE_LIMIT_BUCKETS]
+    if slot[0] != epoch:
+        slot[0] = epoch
+        slot[1] = 0
 
     # Check if under limit
-    if len(rate_limit_storage[client_ip]) >= RATE_LIMIT_REQUESTS:
+    oldest = epoch - RATE_LIMIT_BUCKETS
+    current_count = sum(count for slot_epoch, count in ring if slot_epoch > oldest)
+    if current_count >= RATE_LIMIT_REQUESTS:
         return False
 
     # Add current request
-    rate_limit_storage[client_ip].append(current_time)
+    slot[1] += 1
     return True
 
 
@@ -234,7 +630,7 @@ def get_client_ip(request: Request) -> str:
     # Check for forwarded IP first (for proxies/load balancers)
     forwarded_for = request.headers.get("X-Forwarded-For")
     if forwarded_for:
-        return forwarded_for.split(",")[0].strip()
+        return forwarded_for.partition(",")[0].strip()
 
     # Check for real IP header
     real_ip = request.headers.get("X-Real-IP")
@@ -245,12 +641,8 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
-async def call_cerebras_api(
-    prompt: str, model: str = "qwen-3-coder-480b", temperature: float = 0.8
-) -> str:
-    """Call Cerebras API to generate UI code"""
-
-    system_prompt = """You are an expert web developer and UI/UX designer. Create a complete, beautiful HTML page based on the user's request.
+# System prompt shared by every generation; the message dict is reused as-is
+SYSTEM_PROMPT = """You are an expert web developer and UI/UX designer. Create a complete, beautiful HTML page based on the user's request.
 
 Requirements:
 - Create a single HTML file with embedded CSS and JavaScript
@@ -266,38 +658,347 @@ Requirements:
 - Return ONLY the complete HTML code, no explanations or markdown
 
 The page should be production-ready and visually impressive!"""
+SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
 
-    try:
-        from cerebras.cloud.sdk import Cerebras
 
-        client = Cerebras(api_key=CEREBRAS_API_KEY)
+def strip_code_fence(text: str) -> str:
+    """Remove a leading ```html / ``` fence and a trailing ``` fence"""
+    text = text.strip()
+    if text.startswith("```html"):
+        text = text[7:]
+    elif text.startswith("```"):
+        text = text[3:]
+    if text.endswith("```"):
+        text = text[:-3]
+    return text.strip()
+
 
-        chat_completion = client.chat.completions.create(
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": prompt},
-            ],
+async def call_cerebras_api(
+    prompt: str,
+    model: str = "qwen-3-coder-480b",
+    temperature: float = 0.8,
+    stream: bool = False,
+):
+    """Call Cerebras API to generate UI code
+
+    Returns the cleaned HTML and the completion's finish_reason, or with
+    stream=True the raw chunk stream for stream_generation to consume.
+    """
+
+    try:
+        if not cerebras_client:
+            raise RuntimeError("CEREBRAS_API_KEY is not configured")
+
+        chat_completion = await cerebras_client.chat.completions.create(
+            messages=[SYSTEM_MESSAGE, {"role": "user", "content": prompt}],
             model=model,
             temperature=temperature,
             max_tokens=4000,
+            stream=stream,
         )
 
-        generated_content = chat_completion.choices[0].message.content
+        if stream:
+            return chat_completion
+
+        choice = chat_completion.choices[0]
 
         # Clean up the response (remove markdown code blocks if present)
-        clean_html = generated_content.replace("```html", "").replace("```", "").strip()
+        clean_html = strip_code_fence(choice.message.content)
 
         logger.info(f"Successfully generated UI with {len(clean_html)} characters")
-        return clean_html
+        return clean_html, choice.finish_reason
 
     except Exception as e:
         logger.error(f"Error calling Cerebras API: {e}")
         raise HTTPException(status_code=503, detail="Failed to generate UI")
 
 
-def get_fallback_ui(error_msg: str = "Something went wrong") -> str:
-    """Generate a simple fallback UI when API fails"""
-    return """
+def ui_cache_key(prompt: str, model: str, temperature: float) -> str:
+    """Response cache key for a generation request"""
+    digest = hashlib.blake2b(
+        f"{prompt}|{model}|{temperature:.1f}".encode(), digest_size=16
+    ).hexdigest()
+    return f"ui:{digest}"
+
+
+async def get_cached_ui(key: str) -> Optional[str]:
+    """Look up previously generated HTML (None on miss, without Redis, or disabled)"""
+    if not redis_client or UI_CACHE_TTL <= 0:
+        return None
+    try:
+        return await redis_client.get(key)
+    except Exception as e:
+        logger.error(f"Redis cache read error: {e}")
+        return None
+
+
+async def set_cached_ui(key: str, html: str, finish_reason: Optional[str]):
+    """Store generated HTML for UI_CACHE_TTL seconds (a TTL <= 0 disables caching)
+
+    Only complete pages are cached: a completion cut off at max_tokens (or
+    otherwise not finished with "stop") is served once, never reused.
+    """
+    if not redis_client or UI_CACHE_TTL <= 0:
+        return
+    if finish_reason != "stop" or not html:
+        logger.info(f"Not caching UI (finish_reason={finish_reason})")
+        return
+    try:
+        await redis_client.set(key, html, ex=UI_CACHE_TTL)
+    except Exception as e:
+        logger.error(f"Redis cache write error: {e}")
+
+
+# Generations currently running, keyed by cache key; identical requests
+# await the existing future instead of calling the API again
+inflight_generations: Dict[str, asyncio.Future] = {}
+
+
+# Seconds before an unfinished generation is dropped: the client's worst case
+# (every attempt timing out) plus a margin for retry backoff and streaming
+GENERATION_TIMEOUT = CEREBRAS_TIMEOUT * (CEREBRAS_MAX_RETRIES + 1) + 30
+
+
+def start_generation(key: str) -> asyncio.Future:
+    """Register a new in-flight generation for key"""
+    loop = asyncio.get_running_loop()
+    inflight = loop.create_future()
+    inflight_generations[key] = inflight
+    # Safety net in case the upstream stream stalls without raising
+    loop.call_later(GENERATION_TIMEOUT, finish_generation, key, inflight, None)
+    return inflight
+
+
+def finish_generation(
+    key: str, inflight: Optional[asyncio.Future], html_content: Optional[str]
+):
+    """Hand the result (None on failure) to waiting requests and unregister"""
+    if inflight is None:
+        return
+    if inflight_generations.get(key) is inflight:
+        del inflight_generations[key]
+    if not inflight.done():
+        inflight.set_result(html_content)
+
+
+class FenceStripper:
+    """Strip a markdown code fence from HTML that arrives in pieces
+
+    Only a leading ```html (or ```) and a trailing ``` are removed, along with
+    the surrounding whitespace. Text that could still turn out to be part of a
+    fence is held back until the next piece (or flush) decides it, and
+    whitespace after the opening fence is dropped until content arrives.
+    """
+
+    OPENING_FENCES = ("```html", "```")
+
+    def __init__(self):
+        self.head = ""
+        self.started = False
+        self.leading = True
+        self.tail = ""
+
+    def feed(self, text: str) -> str:
+        if not self.started:
+            self.head += text
+            stripped = self.head.lstrip()
+            if not stripped or "```html".startswith(stripped):
+                return ""
+            text = self._strip_opening(stripped)
+        return self._emit(text)
+
+    def flush(self) -> str:
+        if not self.started:
+            text = self._emit(self._strip_opening(self.head.lstrip()))
+        else:
+            text = ""
+        tail = self.tail.rstrip()
+        if tail.endswith("```"):
+            tail = tail[:-3].rstrip()
+        self.tail = ""
+        return text + tail
+
+    def _strip_opening(self, text: str) -> str:
+        self.started = True
+        self.head = ""
+        for fence in self.OPENING_FENCES:
+            if text.startswith(fence):
+                return text[len(fence) :].lstrip()
+        return text
+
+    def _emit(self, text: str) -> str:
+        if self.leading:
+            # Whitespace after the fence may arrive in later pieces
+            text = text.lstrip()
+            self.leading = not text
+        buf = self.tail + text
+        # Hold back trailing whitespace and up to three backticks
+        end = len(buf.rstrip())
+        end -= min(3, end - len(buf[:end].rstrip("`")))
+        end = len(buf[:end].rstrip())
+        self.tail = buf[end:]
+        return buf[:end]
+
+
+async def stream_generation(
+    stream,
+    prompt: str,
+    model: str,
+    cache_key: str,
+    inflight: Optional[asyncio.Future],
+    pieces: asyncio.Queue,
+):
+    """Read a Cerebras chunk stream to the end and record the result
+
+    Runs as a background task so the generation does not depend on any one
+    client: cleaned HTML is put on `pieces` for the response that started it
+    (None marks the end), and the complete page is written to the response
+    cache, handed to requests waiting on the same in-flight generation and
+    recorded in history even if that client has disconnected.
+    """
+    stripper = FenceStripper()
+    chunks = []
+    html_content = None
+    finish_reason = None
+
+    try:
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            choice = chunk.choices[0]
+            finish_reason = choice.finish_reason or finish_reason
+            piece = stripper.feed(choice.delta.content or "")
+            if piece:
+                chunks.append(piece)
+                pieces.put_nowait(piece)
+
+        piece = stripper.flush()
+        if piece:
+            chunks.append(piece)
+            pieces.put_nowait(piece)
+
+        html_content = "".join(chunks)
+
+    except Exception as e:
+        # Headers are already sent, so all we can do is end the response
+        logger.error(f"Error streaming UI: {e}")
+
+    finally:
+        pieces.put_nowait(None)
+        finish_generation(cache_key, inflight, html_content)
+        # Release the upstream connection back to the shared client's pool
+        await stream.close()
+
+    if html_content is None:
+        return
+
+    html_length = len(html_content)
+    logger.info(f"Successfully streamed UI with {html_length} characters")
+
+    await set_cached_ui(cache_key, html_content, finish_reason)
+
+    # Store in history
+    ui_entry = {
+        "prompt": prompt,
+        "model": model,
+        "html_length": html_length,
+        "timestamp": time.time(),
+    }
+    record_ui_history(ui_entry)
+
+
+async def relay_generation(pieces: asyncio.Queue):
+    """Yield HTML pieces from a running stream_generation until it ends"""
+    while True:
+        piece = await pieces.get()
+        if piece is None:
+            return
+        yield piece
+
+
+async def run_generation(
+    prompt: str,
+    model: str,
+    temperature: float,
+    cache_key: str,
+    inflight: Optional[asyncio.Future],
+) -> str:
+    """Generate a complete UI, cache it and record it in history
+
+    Meant to run as a background task so that waiting requests still get the
+    result if the request that started it goes away.
+    """
+    html_content = None
+    try:
+        html_content, finish_reason = await call_cerebras_api(
+            prompt, model, temperature
+        )
+    finally:
+        finish_generation(cache_key, inflight, html_content)
+    await set_cached_ui(cache_key, html_content, finish_reason)
+
+    # Store in history
+    ui_entry = {
+        "prompt": prompt,
+        "model": model,
+        "html_length": len(html_content),
+        "timestamp": time.time(),
+    }
+    record_ui_history(ui_entry)
+
+    return html_content
+
+
+def precompress(body: bytes) -> Dict[str, bytes]:
+    """Compress a static response body once for every supported encoding"""
+    variants = {"identity": body, "gzip": gzip.compress(body, 9, mtime=0)}
+    if brotli:
+        variants["br"] = brotli.compress(body, quality=11)
+    return variants
+
+
+def choose_encoding(request: Request, variants: Dict[str, bytes]) -> str:
+    """Pick the precompressed variant the client ranks highest by q-value"""
+    qualities = {}
+    for part in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value.strip())
+                except ValueError:
+                    quality = 0.0
+        qualities[coding] = quality
+
+    # An explicit entry (including q=0, a refusal) overrides the * wildcard;
+    # br wins ties because it compresses better
+    wildcard = qualities.get("*", 0.0)
+    best_encoding, best_quality = "identity", 0.0
+    for encoding in ("br", "gzip"):
+        if encoding not in variants:
+            continue
+        quality = qualities.get(encoding, wildcard)
+        if quality > best_quality:
+            best_encoding, best_quality = encoding, quality
+    return best_encoding
+
+
+def precompressed_html(request: Request, variants: Dict[str, bytes]) -> HTMLResponse:
+    """Serve a precompressed HTML page in the client's preferred encoding"""
+    encoding = choose_encoding(request, variants)
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return HTMLResponse(content=variants[encoding], headers=headers)
+
+
+# Simple fallback UI shown when the API fails, compressed once at import
+FALLBACK_HTML = """
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -396,14 +1097,15 @@ def get_fallback_ui(error_msg: str = "Something went wrong") -> str:
     </div>
 </body>
 </html>"""
+FALLBACK_HTML_VARIANTS = precompress(FALLBACK_HTML.encode("utf-8"))
 
 
 @app.get("/", response_class=HTMLResponse)
-async def generate_random_ui(request: Request):
+async def generate_random_ui(request: Request, no_cache: bool = False):
     """Generate a random UI on each request"""
     # Check rate limit
     client_ip = get_client_ip(request)
-    if not check_rate_limit(client_ip):
+    if not await check_rate_limit(client_ip):
         raise HTTPException(
             status_code=429,
             detail=f"Rate limit exceeded. Maximum {RATE_LIMIT_REQUESTS} requests per {RATE_LIMIT_WINDOW} seconds.",
@@ -411,40 +1113,62 @@ async def generate_random_ui(request: Request):
 
     try:
         # Select a random prompt
-        random_prompt = random.choice(UI_PROMPTS)
-        random_model = random.choice(AVAILABLE_MODELS)
+        random_prompt = next(PROMPT_CYCLE)
+        random_model = next(MODEL_CYCLE)
+        temperature = 0.8
+
+        cache_key = ui_cache_key(random_prompt, random_model, temperature)
+        inflight = None
+        if not no_cache:
+            cached_html = await get_cached_ui(cache_key)
+            if cached_html:
+                logger.info(f"Serving cached UI for prompt: {random_prompt}")
+                return HTMLResponse(content=cached_html)
+
+            pending = inflight_generations.get(cache_key)
+            if pending:
+                logger.info(f"Joining in-flight generation for prompt: {random_prompt}")
+                html_content = await asyncio.shield(pending)
+                if html_content is None:
+                    raise RuntimeError("In-flight generation failed")
+                return HTMLResponse(content=html_content)
+
+            inflight = start_generation(cache_key)
 
         logger.info(f"Generating UI with prompt: {random_prompt}")
 
-        # Generate UI using Cerebras API
-        html_content = await call_cerebras_api(random_prompt, random_model)
-
-        # Store in history
-        ui_entry = {
-            "prompt": random_prompt,
-            "model": random_model,
-            "html_length": len(html_content),
-            "timestamp": asyncio.get_event_loop().time(),
-        }
-        ui_history.append(ui_entry)
-
-        # Keep only last 20 entries
-        if len(ui_history) > 20:
-            ui_history.pop(0)
-
-        return HTMLResponse(content=html_content)
+        # Open a streaming completion so HTML reaches the browser as it is generated
+        try:
+            stream = await call_cerebras_api(
+                random_prompt, random_model, temperature, stream=True
+            )
+        except Exception:
+            finish_generation(cache_key, inflight, None)
+            raise
 
     except Exception as e:
         logger.error(f"Error generating UI: {e}")
-        return HTMLResponse(content=get_fallback_ui("API temporarily unavailable"))
+        return precompressed_html(request, FALLBACK_HTML_VARIANTS)
+
+    # Read the stream in its own task so a disconnect here does not cut off
+    # requests that joined this generation
+    pieces = asyncio.Queue()
+    spawn_background(
+        stream_generation(
+            stream, random_prompt, random_model, cache_key, inflight, pieces
+        )
+    )
+    return StreamingResponse(relay_generation(pieces), media_type="text/html")
 
 
 @app.post("/api/generate", response_model=GenerateResponse)
-async def generate_custom_ui(request: GenerateRequest, http_request: Request):
+async def generate_custom_ui(
+    request: GenerateRequest, http_request: Request, no_cache: bool = False
+):
     """Generate UI with custom prompt"""
     # Check rate limit
     client_ip = get_client_ip(http_request)
-    if not check_rate_limit(client_ip):
+    if not await check_rate_limit(client_ip):
         raise HTTPException(
             status_code=429,
             detail=f"Rate limit exceeded. Maximum {RATE_LIMIT_REQUESTS} requests per {RATE_LIMIT_WINDOW} seconds.",
@@ -459,20 +1183,38 @@ async def generate_custom_ui(request: GenerateRequest, http_request: Request):
                 status_code=400, detail=f"Model must be one of: {AVAILABLE_MODELS}"
             )
 
+        cache_key = ui_cache_key(request.prompt, request.model, request.temperature)
+        inflight = None
+        if not no_cache:
+            cached_html = await get_cached_ui(cache_key)
+            if cached_html:
+                logger.info(f"Serving cached custom UI: {request.prompt[:50]}...")
+                return GenerateResponse(
+                    html=cached_html, prompt=request.prompt, model=request.model
+                )
+
+            pending = inflight_generations.get(cache_key)
+            if pending:
+                logger.info(f"Joining in-flight custom UI: {request.prompt[:50]}...")
+                html_content = await asyncio.shield(pending)
+                if html_content is None:
+                    raise HTTPException(status_code=503, detail="Failed to generate UI")
+                return GenerateResponse(
+                    html=html_content, prompt=request.prompt, model=request.model
+                )
+
+            inflight = start_generation(cache_key)
+
         logger.info(f"Generating custom UI: {request.prompt[:50]}...")
 
-        html_content = await call_cerebras_api(
-            request.prompt, request.model, request.temperature
+        # Shielded so a client disconnect does not cancel the generation that
+        # other requests may have joined
+        generation = spawn_background(
+            run_generation(
+                request.prompt, request.model, request.temperature, cache_key, inflight
+            )
         )
-
-        # Store in history
-        ui_entry = {
-            "prompt": request.prompt,
-            "model": request.model,
-            "html_length": len(html_content),
-            "timestamp": asyncio.get_event_loop().time(),
-        }
-        ui_history.append(ui_entry)
+        html_content = await asyncio.shield(generation)
 
         return GenerateResponse(
             html=html_content, prompt=request.prompt, model=request.model
@@ -485,10 +1227,8 @@ async def generate_custom_ui(request: GenerateRequest, http_request: Request):
         raise HTTPException(status_code=500, detail="Failed to generate UI")
 
 
-@app.get("/admin", response_class=HTMLResponse)
-async def admin_panel():
-    """Simple admin panel for custom UI generation"""
-    admin_html = """
+# Simple admin panel for custom UI generation, compressed once at import
+ADMIN_HTML = """
 <!DOCTYPE html>
 <html lang="en">
 <head>
@@ -706,7 +1446,7 @@ async def admin_panel():
             `;
             
             try {
-                const response = await fetch('/api/generate', {
+                const response = await fetch('/api/generate?no_cache=true', {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
                     body: JSON.stringify(data)
@@ -749,7 +1489,13 @@ async def admin_panel():
 </body>
 </html>
     """
-    return HTMLResponse(content=admin_html)
+ADMIN_HTML_VARIANTS = precompress(ADMIN_HTML.encode("utf-8"))
+
+
+@app.get("/admin", response_class=HTMLResponse)
+async def admin_panel(request: Request):
+    """Simple admin panel for custom UI generation"""
+    return precompressed_html(request, ADMIN_HTML_VARIANTS)
 
 
 @app.get("/api/history")
@@ -757,13 +1503,14 @@ async def get_ui_history(request: Request):
     """Get UI generation history"""
     # Check rate limit
     client_ip = get_client_ip(request)
-    if not check_rate_limit(client_ip):
+    if not await check_rate_limit(client_ip):
         raise HTTPException(
             status_code=429,
             detail=f"Rate limit exceeded. Maximum {RATE_LIMIT_REQUESTS} requests per {RATE_LIMIT_WINDOW} seconds.",
         )
 
-    return {"history": ui_history[-10:], "total": len(ui_history)}
+    history, total = await load_ui_history(10)
+    return {"history": history, "total": total}
 
 
 @app.get("/api/models")
@@ -771,7 +1518,7 @@ async def get_available_models(request: Request):
     """Get list of available models"""
     # Check rate limit
     client_ip = get_client_ip(request)
-    if not check_rate_limit(client_ip):
+    if not await check_rate_limit(client_ip):
         raise HTTPException(
             status_code=429,
             detail=f"Rate limit exceeded. Maximum {RATE_LIMIT_REQUESTS} requests per {RATE_LIMIT_WINDOW} seconds.",
@@ -780,26 +1527,50 @@ async def get_available_models(request: Request):
     return {"models": AVAILABLE_MODELS}
 
 
+# Health results are reused for a short while so aggressive liveness polling
+# does not turn into a Redis and database round trip per probe
+HEALTH_CACHE_TTL = 2.0  # seconds
+HEALTH_PROBE_TIMEOUT = 0.5  # seconds per backend probe
+health_cache = {"expires": 0.0, "result": None}
+
+
+async def probe_redis() -> str:
+    """Ping Redis with a bounded timeout"""
+    if not redis_client:
+        return "not_available"
+    try:
+        await asyncio.wait_for(redis_client.ping(), HEALTH_PROBE_TIMEOUT)
+        return "connected"
+    except Exception:
+        return "disconnected"
+
+
+async def probe_database() -> str:
+    """Run SELECT 1 on a pooled connection with a bounded timeout"""
+    if not db_engine:
+        return "not_available"
+
+    async def ping():
+        async with db_engine.connect() as conn:
+            await conn.scalar(text("SELECT 1"))
+
+    try:
+        await asyncio.wait_for(ping(), HEALTH_PROBE_TIMEOUT)
+        return "connected"
+    except Exception:
+        return "disconnected"
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    redis_status = "not_available"
-    if redis_client:
-        try:
-            redis_client.ping()
-            redis_status = "connected"
-        except:
-            redis_status = "disconnected"
+    now = time.monotonic()
+    if health_cache["result"] and now < health_cache["expires"]:
+        return health_cache["result"]
 
-    db_status = "not_available"
-    if SessionLocal:
-        try:
-            db = SessionLocal()
-            db.execute("SELECT 1")
-            db.close()
-            db_status = "connected"
-        except:
-            db_status = "disconnected"
+    redis_status, db_status, total_generated = await asyncio.gather(
+        probe_redis(), probe_database(), count_ui_history(HEALTH_PROBE_TIMEOUT)
+    )
 
     # Determine which storage is being used
     if redis_client and redis_status == "connected":
@@ -809,10 +1580,10 @@ async def health_check():
     else:
         storage_type = "memory"
 
-    return {
+    result = {
         "status": "healthy",
         "api_key_configured": bool(CEREBRAS_API_KEY),
-        "total_generated": len(ui_history),
+        "total_generated": total_generated,
         "rate_limiting": {
             "redis_status": redis_status,
             "database_status": db_status,
@@ -821,6 +1592,9 @@ async def health_check():
             "storage_type": storage_type,
         },
     }
+    health_cache["result"] = result
+    health_cache["expires"] = now + HEALTH_CACHE_TTL
+    return result
 
 
 @app.get("/api/random-prompt")
@@ -828,13 +1602,13 @@ async def get_random_prompt(request: Request):
     """Get a random UI generation prompt"""
     # Check rate limit
     client_ip = get_client_ip(request)
-    if not check_rate_limit(client_ip):
+    if not await check_rate_limit(client_ip):
         raise HTTPException(
             status_code=429,
             detail=f"Rate limit exceeded. Maximum {RATE_LIMIT_REQUESTS} requests per {RATE_LIMIT_WINDOW} seconds.",
         )
 
-    return {"prompt": random.choice(UI_PROMPTS)}
+    return {"prompt": next(PROMPT_CYCLE)}
 
 
 if __name__ == "__main__":